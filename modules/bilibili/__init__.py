@@ -11,33 +11,47 @@ Main Components:
 - Utility functions and API client
 """
 
-# TODO: 临时注释掉未实现的模块，避免导入错误
-# from .list_fetcher import BilibiliListFetcher
-# from .video_fetcher import BilibiliVideoFetcher
-# from .models import (
-#     VideoMetadata,
-#     UserInfo,
-#     VideoStats,
-#     CommentInfo,
-#     PlaylistInfo,
-#     SearchResult,
-#     APIResponse,
-#     VideoQuality,
-#     VideoStatus
-# )
-# from .utils import (
-#     BilibiliAPIClient,
-#     RateLimiter,
-#     DataValidator,
-#     BilibiliUtils,
-#     APIError,
-#     ValidationError,
-#     APIConfig
-# )
+import importlib
 
-# 导入已实现的模块
+# 导入已实现的模块（TaskHub 为常用入口，直接导入）
 from .task_hub import TaskHub
 
+# 其余组件按需延迟导入（PEP 562），只使用 TaskHub 时不必加载抓取器及其依赖
+_LAZY_IMPORTS = {
+    # TODO: 待实现的模块，实现后取消注释即可按需导入
+    # "BilibiliListFetcher": ".list_fetcher",
+    # "BilibiliVideoFetcher": ".video_fetcher",
+    # "VideoMetadata": ".models",
+    # "UserInfo": ".models",
+    # "VideoStats": ".models",
+    # "CommentInfo": ".models",
+    # "PlaylistInfo": ".models",
+    # "SearchResult": ".models",
+    # "APIResponse": ".models",
+    # "VideoQuality": ".models",
+    # "VideoStatus": ".models",
+    # "BilibiliAPIClient": ".utils",
+    # "RateLimiter": ".utils",
+    # "DataValidator": ".utils",
+    # "BilibiliUtils": ".utils",
+    # "APIError": ".utils",
+    # "ValidationError": ".utils",
+    # "APIConfig": ".utils",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value  # 缓存，后续访问不再经过 __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
+
 __version__ = "1.0.0"
 __author__ = "TL_ComputerUseDatasets Team"
 
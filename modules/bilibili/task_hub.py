@@ -4,41 +4,105 @@ TaskHub - 任务管理中心
 实现单例模式的PostgreSQL任务管理中心，提供统一的任务注册、提取和状态更新功能。
 """
 
+import asyncio
+import atexit
+import io
+import re
+import select
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from psycopg2 import sql
+from psycopg2.extras import execute_values
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 import threading
+import time
+import weakref
 from contextlib import contextmanager
 from pathlib import Path
 import yaml
 from loguru import logger
 
+from modules import json_utils
+from modules.config_loader import load_yaml
+
+# 表名只允许字母、数字和下划线；用 \Z 而非 $，避免末尾换行符通过校验
+_TABLE_NAME_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*\Z')
+
+_TASK_COLUMNS = sql.SQL("id, url, title, duration, status, download_type, log, created_at, modified_at")
+
+def _copy_csv_field(value: Any) -> str:
+    """格式化 COPY (FORMAT csv, NULL '\\N') 的单个字段
+    
+    None 写为未加引号的 \\N；字符串一律加引号，加引号的值不会被识别为 NULL，
+    因此空字符串和字面量 "\\N" 都按原样入库，与 execute_values 路径一致。
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+class _KeepIdleConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """启动时只建立 minconn 个连接，归还时最多保留 maxidle 个空闲连接
+    
+    psycopg2 的连接池在创建时逐个建立 minconn 个连接，归还时空闲连接数达到 minconn 就直接关闭。
+    两者共用一个参数会导致：minconn 小则高并发下反复建连（及重新 PREPARE），
+    minconn 大则每个进程启动即占满服务端连接数。这里在建立初始连接后把保留阈值提高到 maxidle。
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, maxidle: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        # minconn 之后只用于 _putconn 判断是否保留归还的连接
+        self.minconn = maxidle
+
+
+# 使用服务端预编译的语句及其参数个数
+_PREPARED_STATEMENTS = {
+    'insert': 3,
+    'get_id_by_url': 1,
+    'get_by_id': 1,
+    'get_status': 1,
+    'update_status': 4,
+}
 
 class TaskHub:
     """任务管理中心 - 单例模式管理PostgreSQL连接和所有任务操作"""
     
     _instance = None
     _lock = threading.Lock()
+    _pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+    # 连接池满时 ThreadedConnectionPool 会直接抛出 PoolError，用信号量让调用方排队等待空闲连接
+    _pool_slots: Optional[threading.BoundedSemaphore] = None
+    # 每个连接上已 PREPARE 的语句名，连接被丢弃后自动清理
+    _prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+    # 每个连接最近一次归还的时间（time.monotonic），用于判断复用前是否需要探活
+    _last_used: "weakref.WeakKeyDictionary[Any, float]" = weakref.WeakKeyDictionary()
+    # 最近一次发现断开连接的时间；此前归还的空闲连接可能同样已失效（如数据库重启）
+    _pool_broken_at: float = 0.0
+    
+    db_config: Optional[Dict[str, Any]]
+    table_name: str
+    initialized: bool
     
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
-                    cls._instance = super(TaskHub, cls).__new__(cls)
+                    # 属性在锁内完成初始化后才发布实例，保证只执行一次
+                    instance = super(TaskHub, cls).__new__(cls)
+                    instance.db_config = None
+                    instance.table_name = 'bilibili_tasks'  # 默认表名
+                    instance.initialized = False
+                    cls._instance = instance
+                    logger.info("TaskHub实例创建")
         return cls._instance
     
-    def __init__(self):
-        if not hasattr(self, 'initialized'):
-            self.db_config: Optional[Dict[str, Any]] = None
-            self.table_name: str = 'bilibili_tasks'  # 默认表名
-            self.initialized = False
-            logger.info("TaskHub实例创建")
-    
     def _validate_table_name(self, table_name: str) -> bool:
         """验证表名安全性，只允许字母、数字和下划线"""
-        import re
-        return bool(re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name))
+        return _TABLE_NAME_RE.match(table_name) is not None
     
     def _load_db_config(self, db_config_path: Optional[str] = None) -> Dict[str, Any]:
         """加载数据库配置文件
@@ -64,8 +128,7 @@ class TaskHub:
             raise FileNotFoundError(f"配置文件不存在: {config_path}")
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = load_yaml(config_path)
             
             if 'database' not in config:
                 raise ValueError("配置文件中缺少 'database' 配置节")
@@ -76,6 +139,176 @@ class TaskHub:
         except Exception as e:
             raise ValueError(f"读取配置文件失败: {e}")
     
+    def _build_sql(self, table_name: str) -> Dict[str, Any]:
+        """表名确定后一次性构建所有SQL语句，表名通过 sql.Identifier 安全引用"""
+        t = sql.Identifier(table_name)
+        statements = {
+            # ---------- 服务端预编译语句（$n 参数） ----------
+            # URL 已存在时不插入，返回已有任务的ID；外层 SELECT 使用语句开始时的快照，
+            # 因此新插入的行只会由 ins 返回一次
+            'insert': """
+                WITH ins AS (
+                    INSERT INTO {t} (url, title, duration, status, created_at, modified_at)
+                    VALUES ($1, $2, $3, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                    ON CONFLICT (url) DO NOTHING
+                    RETURNING id
+                )
+                SELECT id, TRUE FROM ins
+                UNION ALL
+                SELECT id, FALSE FROM {t} WHERE url = $1
+            """,
+            'get_id_by_url': "SELECT id FROM {t} WHERE url = $1",
+            'get_by_id': "SELECT {columns} FROM {t} WHERE id = $1",
+            'get_status': "SELECT status FROM {t} WHERE id = $1",
+            'update_status': """
+                UPDATE {t} 
+                SET status = $1, 
+                    download_type = COALESCE($2, download_type),
+                    log = COALESCE($3, log),
+                    modified_at = CURRENT_TIMESTAMP
+                WHERE id = $4
+            """,
+            # ---------- 普通语句（%s 参数） ----------
+            'batch_insert': """
+                INSERT INTO {t} (url, title, duration, status, created_at, modified_at)
+                VALUES %s
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id
+            """,
+            # 大批量注册：COPY 到会话临时表，再一次性 INSERT ... SELECT 去重
+            'staging_create': """
+                CREATE TEMP TABLE taskhub_staging (
+                    url text,
+                    title text,
+                    duration numeric  -- 与 VALUES 路径一致，写入目标表时再按赋值转换取整
+                ) ON COMMIT DROP
+            """,
+            'staging_copy': "COPY taskhub_staging (url, title, duration) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            'staging_insert': """
+                INSERT INTO {t} (url, title, duration, status, created_at, modified_at)
+                SELECT url, title, duration, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM taskhub_staging
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id
+            """,
+            'get_pending': """
+                SELECT {columns}
+                FROM {t} 
+                WHERE status = 0 
+                ORDER BY created_at ASC 
+                LIMIT %s
+            """,
+            'claim_pending': """
+                UPDATE {t} 
+                SET status = 2, 
+                    log = %s,
+                    modified_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM {t} 
+                    WHERE status = 0 
+                    ORDER BY created_at ASC 
+                    LIMIT %s 
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {columns}
+            """,
+            'get_by_status': """
+                SELECT {columns}
+                FROM {t} 
+                WHERE status = %s 
+                ORDER BY created_at DESC 
+                LIMIT %s
+            """,
+            'soft_delete': """
+                UPDATE {t} 
+                SET status = -99, 
+                    log = %s,
+                    modified_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND status <> -99
+            """,
+            'batch_delete': """
+                WITH req (id, log) AS (VALUES %s),
+                upd AS (
+                    UPDATE {t} AS t
+                    SET status = -99, 
+                        log = req.log,
+                        modified_at = CURRENT_TIMESTAMP
+                    FROM req
+                    WHERE t.id = req.id AND t.status <> -99
+                    RETURNING t.id
+                )
+                SELECT req.id, t.status, upd.id IS NOT NULL
+                FROM req
+                LEFT JOIN {t} AS t ON t.id = req.id
+                LEFT JOIN upd ON upd.id = req.id
+            """,
+            'restore': """
+                UPDATE {t} 
+                SET status = %s, 
+                    log = %s,
+                    modified_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND status = -99
+            """,
+            'get_deleted': """
+                SELECT {columns}
+                FROM {t} 
+                WHERE status = -99 
+                ORDER BY modified_at DESC 
+                LIMIT %s
+            """,
+            'statistics': """
+                SELECT 
+                    COUNT(*) as total,
+                    COUNT(*) FILTER (WHERE status = 0) as pending,
+                    COUNT(*) FILTER (WHERE status = 1) as success,
+                    COUNT(*) FILTER (WHERE status = -1) as failed,
+                    COUNT(*) FILTER (WHERE status = 2) as processing,
+                    COUNT(*) FILTER (WHERE status = -99) as deleted,
+                    COUNT(*) FILTER (WHERE status NOT IN (0, 1, -1, 2, -99)) as other
+                FROM {t}
+            """,
+            'statistics_fast': """
+                SELECT 
+                    (SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(%s)) as total,
+                    (SELECT COUNT(*) FROM {t} WHERE status = 0) as pending,
+                    (SELECT COUNT(*) FROM {t} WHERE status = 2) as processing
+            """,
+            'get_recent': """
+                SELECT {columns}
+                FROM {t} 
+                WHERE created_at >= NOW() - %s * INTERVAL '1 hour'
+                ORDER BY created_at DESC 
+                LIMIT %s
+            """,
+        }
+        compiled = {
+            key: sql.SQL(statement).format(t=t, columns=_TASK_COLUMNS)
+            for key, statement in statements.items()
+        }
+        
+        # 预编译语句的 PREPARE / EXECUTE 形式
+        for key, param_count in _PREPARED_STATEMENTS.items():
+            name = sql.Identifier(f"taskhub_{key}")
+            compiled[f"prepare_{key}"] = sql.SQL("PREPARE {name} AS ").format(name=name) + compiled[key]
+            compiled[f"execute_{key}"] = sql.SQL("EXECUTE {name} ({params})").format(
+                name=name, params=sql.SQL(', ').join(sql.Placeholder() * param_count))
+        
+        # ensure_indexes 使用的建索引语句
+        compiled['indexes'] = [
+            sql.SQL(statement).format(t=t, name=sql.Identifier(f"idx_{table_name}_{suffix}"))
+            for suffix, statement in (
+                # get_pending_tasks / claim_pending_tasks：部分索引只包含待处理任务，体积很小
+                ('pending_created_at', "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {t}(created_at) WHERE status = 0"),
+                # get_tasks_by_status
+                ('status_created_at', "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {t}(status, created_at DESC)"),
+                # get_deleted_tasks
+                ('deleted_modified_at', "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {t}(modified_at DESC) WHERE status = -99"),
+                # get_recent_tasks 的时间范围扫描（与建表脚本中的同名索引一致）
+                ('created_at', "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {t}(created_at)"),
+            )
+        ]
+        return compiled
+    
     def initialize(self, db_config_path: Optional[str] = None, environment: str = 'playground_table'):
         """初始化数据库配置
         
@@ -104,38 +337,158 @@ class TaskHub:
             
             self.db_config = db_config
             self.table_name = table_name
+            self._sql = self._build_sql(table_name)
             self.initialized = True
             logger.info(f"TaskHub初始化完成，数据库: {db_config.get('host')}:{db_config.get('port')}/{db_config.get('database')}, 表名: {table_name}, 环境: {environment}")
         else:
             logger.warning("TaskHub已经初始化，跳过重复初始化")
     
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        """获取连接池，首次调用时创建（双重检查加锁）"""
+        if TaskHub._pool is None:
+            with self._lock:
+                if TaskHub._pool is None:
+                    pool_config = self.db_config.get('pool_config') or {}
+                    max_connections = pool_config.get('max_connections', 25)
+                    min_connections = min(pool_config.get('min_connections', 2), max_connections)
+                    max_idle = min(pool_config.get('max_idle_connections', max_connections), max_connections)
+                    TaskHub._pool_slots = threading.BoundedSemaphore(max_connections)
+                    TaskHub._pool = _KeepIdleConnectionPool(
+                        minconn=min_connections,
+                        maxconn=max_connections,
+                        maxidle=max(max_idle, min_connections),
+                        host=self.db_config['host'],
+                        port=self.db_config['port'],
+                        database=self.db_config['database'],
+                        user=self.db_config['username'],
+                        password=self.db_config['password'],
+                        connect_timeout=pool_config.get('connection_timeout', 30)
+                    )
+                    atexit.register(self.close_all)
+                    logger.info(f"数据库连接池创建完成，连接数范围: {min_connections}-{max_connections}，"
+                                f"最多保留空闲连接: {max(max_idle, min_connections)}")
+        return TaskHub._pool
+    
+    def close_all(self):
+        """关闭连接池中的所有连接"""
+        with self._lock:
+            if TaskHub._pool is not None and not TaskHub._pool.closed:
+                TaskHub._pool.closeall()
+                logger.info("数据库连接池已关闭")
+            TaskHub._pool = None
+    
     @contextmanager
-    def get_connection(self):
-        """获取数据库连接的上下文管理器"""
+    def get_connection(self, readonly: bool = False):
+        """从连接池获取数据库连接的上下文管理器，退出时结束未提交的事务并归还连接
+        
+        Args:
+            readonly: 是否以只读事务执行，只读方法无需显式提交
+        """
         if not self.initialized:
             raise RuntimeError("TaskHub未初始化，请先调用initialize()方法")
         
-        conn = None
+        pool = self._get_pool()
+        slots = TaskHub._pool_slots
+        timeout = (self.db_config.get('pool_config') or {}).get('connection_timeout', 30)
+        if not slots.acquire(timeout=timeout):
+            logger.error(f"数据库连接错误: 等待空闲连接超时 ({timeout}秒)")
+            raise psycopg2.pool.PoolError("等待空闲连接超时")
         try:
-            conn = psycopg2.connect(
-                host=self.db_config['host'],
-                port=self.db_config['port'],
-                database=self.db_config['database'],
-                user=self.db_config['username'],
-                password=self.db_config['password']
-            )
+            conn = self._checkout(pool)
+        except psycopg2.Error as e:
+            slots.release()
+            logger.error(f"数据库连接错误: {e}")
+            raise
+        
+        try:
+            if readonly:
+                conn.readonly = True
             yield conn
         except psycopg2.Error as e:
             logger.error(f"数据库连接错误: {e}")
             raise
         finally:
-            if conn:
-                conn.close()
+            # 已断开的连接直接丢弃，避免污染连接池
+            close = bool(conn.closed)
+            if close:
+                TaskHub._pool_broken_at = time.monotonic()
+            if not close:
+                try:
+                    # 异常或只读查询留下的事务在归还前回滚，避免连接处于 idle in transaction 状态
+                    if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    if readonly:
+                        conn.readonly = None
+                except psycopg2.Error:
+                    close = True
+            if not close:
+                self._last_used[conn] = time.monotonic()
+            pool.putconn(conn, close=close)
+            slots.release()
+    
+    def _checkout(self, pool: psycopg2.pool.ThreadedConnectionPool):
+        """从连接池取出可用的连接
+        
+        复用的连接若套接字上有待读数据（服务端已断开）、空闲超过 ping_interval 秒，
+        或在连接池发现断连之前归还，先执行 SELECT 1 探活；探活失败则丢弃并换一个连接，避免数据库重启、
+        故障切换或空闲会话被踢后，每个失效连接都让一次调用静默失败。
+        """
+        ping_interval = (self.db_config.get('pool_config') or {}).get('ping_interval', 30)
+        for _ in range(pool.maxconn + 1):
+            conn = pool.getconn()
+            last_used = self._last_used.get(conn)
+            if last_used is None:
+                return conn
+            # 空闲连接上不应有待读数据；可读说明服务端已发来断开通知（如 terminate、重启）
+            readable = bool(select.select([conn], [], [], 0)[0])
+            if (not readable and time.monotonic() - last_used < ping_interval
+                    and last_used > TaskHub._pool_broken_at):
+                return conn
+            try:
+                # autocommit 下探活不会留下未结束的事务，也不影响之后设置 readonly
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.autocommit = False
+                return conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                logger.warning(f"丢弃已断开的数据库连接: {e}")
+                TaskHub._pool_broken_at = time.monotonic()
+                pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("无法从连接池获取可用的数据库连接")
+    
+    def _execute_prepared(self, cur, key: str, params: tuple):
+        """执行服务端预编译语句，每个连接上首次使用时才 PREPARE
+        
+        预编译语句属于会话级对象，不受事务回滚影响，因此可在连接的整个生命周期内复用。
+        """
+        prepared = self._prepared.setdefault(cur.connection, set())
+        if key not in prepared:
+            cur.execute(self._sql[f"prepare_{key}"])
+            prepared.add(key)
+        cur.execute(self._sql[f"execute_{key}"], params)
+    
+    def _fetch_tasks(self, conn, query: sql.Composed, params: tuple, limit: int) -> List[Dict[str, Any]]:
+        """执行任务列表查询
+        
+        limit 超过 stream_threshold 时改用服务端命名游标，按 stream_itersize 分批拉取，
+        避免一次性在客户端缓冲全部结果；小查询仍走普通游标，省去服务端游标的额外开销。
+        """
+        query_config = self.db_config.get('query_config') or {}
+        if limit <= query_config.get('stream_threshold', 1000):
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+        
+        with conn.cursor(name='taskhub_stream', cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.itersize = query_config.get('stream_itersize', 1000)
+            cur.execute(query, params)
+            return list(cur)
     
     def test_connection(self) -> bool:
         """测试数据库连接"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor() as cur:
                     cur.execute("SELECT 1")
                     result = cur.fetchone()
@@ -145,54 +498,93 @@ class TaskHub:
             logger.error(f"数据库连接测试失败: {e}")
             return False
     
+    def ensure_indexes(self) -> bool:
+        """创建与常用查询条件匹配的索引（已存在则跳过）
+        
+        使用 CREATE INDEX CONCURRENTLY，建索引期间不阻塞读写，适用于已有数据的线上表。
+        url 的唯一索引由建表时的 UNIQUE 约束提供，这里不再重复创建。
+        """
+        try:
+            with self.get_connection() as conn:
+                # CONCURRENTLY 不能在事务块内执行
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        for statement in self._sql['indexes']:
+                            cur.execute(statement)
+                finally:
+                    conn.autocommit = False
+            logger.info(f"索引检查完成，表名: {self.table_name}")
+            return True
+        except Exception as e:
+            logger.error(f"创建索引失败: {e}")
+            return False
+    
+    @staticmethod
+    def dumps(rows: Any) -> bytes:
+        """将查询结果序列化为 JSON 字节串，跨进程/网络传递查询结果时推荐使用
+        
+        orjson 原生支持 datetime 和 RealDictRow（dict 子类），无需 default=str 逐值转换。
+        """
+        return json_utils.dumps(rows)
+    
     # ==================== 任务注册方法 ====================
     
     def register_task(self, url: str, title: str = None, duration: int = None) -> int:
-        """注册单个任务到数据库"""
+        """注册单个任务到数据库，URL已存在时返回已有任务的ID"""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(f"""
-                        INSERT INTO {self.table_name} (url, title, duration, status, created_at, modified_at)
-                        VALUES (%s, %s, %s, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                        RETURNING id
-                    """, (url, title, duration))
-                    task_id = cur.fetchone()[0]
+                    self._execute_prepared(cur, 'insert', (url, title, duration))
+                    result = cur.fetchone()
                     conn.commit()
-                    logger.info(f"任务注册成功 - ID: {task_id}, URL: {url}")
-                    return task_id
-        except psycopg2.IntegrityError as e:
-            if "duplicate key" in str(e):
-                logger.warning(f"任务已存在，URL: {url}")
-                # 返回已存在任务的ID
-                return self.get_task_id_by_url(url)
-            else:
-                logger.error(f"任务注册失败: {e}")
-                raise
         except Exception as e:
             logger.error(f"任务注册异常: {e}")
             raise
+        
+        if result is None:
+            # 同一URL正被其他事务并发插入，语句快照中看不到该行，提交后再查询一次
+            logger.warning(f"任务已存在，URL: {url}")
+            return self.get_task_id_by_url(url)
+        
+        task_id, inserted = result
+        if inserted:
+            logger.info(f"任务注册成功 - ID: {task_id}, URL: {url}")
+        else:
+            logger.warning(f"任务已存在，URL: {url}")
+        return task_id
     
     def batch_register_tasks(self, video_list: List[Dict[str, Any]]) -> List[int]:
-        """批量注册任务"""
+        """批量注册任务（已存在的URL自动跳过）
+        
+        数量不超过 copy_threshold 时使用 execute_values 多值 INSERT；
+        超过时改用 COPY 写入临时表后再 INSERT ... SELECT，适合上万条的批量导入。
+        """
         task_ids = []
+        if not video_list:
+            return task_ids
+        query_config = self.db_config.get('query_config') or {}
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    for video in video_list:
-                        try:
-                            cur.execute(f"""
-                                INSERT INTO {self.table_name} (url, title, duration, status, created_at, modified_at)
-                                VALUES (%s, %s, %s, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                                ON CONFLICT (url) DO NOTHING
-                                RETURNING id
-                            """, (video.get('url'), video.get('title'), video.get('duration')))
-                            result = cur.fetchone()
-                            if result:
-                                task_ids.append(result[0])
-                        except Exception as e:
-                            logger.error(f"批量注册单个任务失败: {video.get('url')}, 错误: {e}")
-                            continue
+                    if len(video_list) <= query_config.get('copy_threshold', 1000):
+                        rows = execute_values(
+                            cur, self._sql['batch_insert'],
+                            [(video.get('url'), video.get('title'), video.get('duration')) for video in video_list],
+                            template="(%s, %s, %s, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+                            page_size=500, fetch=True)
+                    else:
+                        buf = io.StringIO()
+                        buf.writelines(
+                            f"{_copy_csv_field(video.get('url'))},{_copy_csv_field(video.get('title'))},"
+                            f"{_copy_csv_field(video.get('duration'))}\n"
+                            for video in video_list)
+                        buf.seek(0)
+                        cur.execute(self._sql['staging_create'])
+                        cur.copy_expert(self._sql['staging_copy'], buf)
+                        cur.execute(self._sql['staging_insert'])
+                        rows = cur.fetchall()
+                    task_ids = [row[0] for row in rows]
                     conn.commit()
                     logger.info(f"批量注册任务完成，成功: {len(task_ids)}/{len(video_list)}")
         except Exception as e:
@@ -203,9 +595,9 @@ class TaskHub:
     def get_task_id_by_url(self, url: str) -> Optional[int]:
         """根据URL获取任务ID"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor() as cur:
-                    cur.execute(f"SELECT id FROM {self.table_name} WHERE url = %s", (url,))
+                    self._execute_prepared(cur, 'get_id_by_url', (url,))
                     result = cur.fetchone()
                     return result[0] if result else None
         except Exception as e:
@@ -215,59 +607,85 @@ class TaskHub:
     # ==================== 任务提取方法 ====================
     
     def get_pending_tasks(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取待处理任务（status=0）"""
+        """获取待处理任务（status=0），仅用于只读查看；工作进程领取任务请使用 claim_pending_tasks"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                    cur.execute(f"""
-                        SELECT id, url, title, duration, status, download_type, log, created_at, modified_at
-                        FROM {self.table_name} 
-                        WHERE status = 0 
-                        ORDER BY created_at ASC 
-                        LIMIT %s
-                    """, (limit,))
-                    tasks = [dict(row) for row in cur.fetchall()]
+                    cur.execute(self._sql['get_pending'], (limit,))
+                    tasks = cur.fetchall()
                     logger.debug(f"获取待处理任务: {len(tasks)}个")
                     return tasks
         except Exception as e:
             logger.error(f"获取待处理任务失败: {e}")
             return []
     
+    def claim_pending_tasks(self, limit: int = 10, log: str = "正在处理") -> List[Dict[str, Any]]:
+        """领取待处理任务并标记为处理中（status=2），工作进程的标准入口
+        
+        使用 FOR UPDATE SKIP LOCKED 在一条语句中完成选取和状态更新，
+        多个工作进程并发领取时不会拿到同一任务。
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    cur.execute(self._sql['claim_pending'], (log, limit))
+                    tasks = cur.fetchall()
+                    conn.commit()
+                    logger.debug(f"领取待处理任务: {len(tasks)}个")
+                    return tasks
+        except Exception as e:
+            logger.error(f"领取待处理任务失败: {e}")
+            return []
+    
     def get_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
         """根据ID获取任务详情"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                    cur.execute(f"""
-                        SELECT id, url, title, duration, status, download_type, log, created_at, modified_at
-                        FROM {self.table_name} 
-                        WHERE id = %s
-                    """, (task_id,))
-                    row = cur.fetchone()
-                    return dict(row) if row else None
+                    self._execute_prepared(cur, 'get_by_id', (task_id,))
+                    return cur.fetchone()
         except Exception as e:
             logger.error(f"根据ID获取任务失败: {e}")
             return None
     
+    def get_task_status(self, task_id: int) -> Optional[int]:
+        """根据ID获取任务状态，只需要状态时使用，比 get_task_by_id 传输的数据更少"""
+        try:
+            with self.get_connection(readonly=True) as conn:
+                with conn.cursor() as cur:
+                    self._execute_prepared(cur, 'get_status', (task_id,))
+                    result = cur.fetchone()
+                    return result[0] if result else None
+        except Exception as e:
+            logger.error(f"根据ID获取任务状态失败: {e}")
+            return None
+    
     def get_tasks_by_status(self, status: int, limit: int = 100) -> List[Dict[str, Any]]:
         """根据状态获取任务列表"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                    cur.execute(f"""
-                        SELECT id, url, title, duration, status, download_type, log, created_at, modified_at
-                        FROM {self.table_name} 
-                        WHERE status = %s 
-                        ORDER BY created_at DESC 
-                        LIMIT %s
-                    """, (status, limit))
-                    tasks = [dict(row) for row in cur.fetchall()]
-                    logger.debug(f"获取状态为{status}的任务: {len(tasks)}个")
-                    return tasks
+            with self.get_connection(readonly=True) as conn:
+                tasks = self._fetch_tasks(conn, self._sql['get_by_status'], (status, limit), limit)
+                logger.debug(f"获取状态为{status}的任务: {len(tasks)}个")
+                return tasks
         except Exception as e:
             logger.error(f"根据状态获取任务失败: {e}")
             return []
     
+    # ==================== 异步方法 ====================
+    
+    async def aget_pending_tasks(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """get_pending_tasks 的异步版本，在线程池中执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.get_pending_tasks, limit)
+    
+    async def aclaim_pending_tasks(self, limit: int = 10, log: str = "正在处理") -> List[Dict[str, Any]]:
+        """claim_pending_tasks 的异步版本，在线程池中执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.claim_pending_tasks, limit, log)
+    
+    async def aupdate_task_status(self, task_id: int, status: int,
+                                  download_type: int = None, log: str = None) -> bool:
+        """update_task_status 的异步版本，在线程池中执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.update_task_status, task_id, status, download_type, log)
+    
     # ==================== 任务状态更新方法 ====================
     
     def update_task_status(self, task_id: int, status: int, 
@@ -276,14 +694,7 @@ class TaskHub:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(f"""
-                        UPDATE {self.table_name} 
-                        SET status = %s, 
-                            download_type = COALESCE(%s, download_type),
-                            log = COALESCE(%s, log),
-                            modified_at = CURRENT_TIMESTAMP
-                        WHERE id = %s
-                    """, (status, download_type, log, task_id))
+                    self._execute_prepared(cur, 'update_status', (status, download_type, log, task_id))
                     success = cur.rowcount == 1
                     conn.commit()
                     if success:
@@ -314,76 +725,51 @@ class TaskHub:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    # 检查任务是否存在且未被删除
-                    cur.execute(f"SELECT status FROM {self.table_name} WHERE id = %s", (task_id,))
-                    result = cur.fetchone()
-                    if not result:
-                        logger.warning(f"删除失败，任务不存在 - ID: {task_id}")
-                        return False
-                    
-                    if result[0] == -99:
-                        logger.warning(f"删除失败，任务已被删除 - ID: {task_id}")
-                        return False
-                    
-                    # 执行软删除
-                    cur.execute(f"""
-                        UPDATE {self.table_name} 
-                        SET status = -99, 
-                            log = %s,
-                            modified_at = CURRENT_TIMESTAMP
-                        WHERE id = %s
-                    """, (f"已删除: {reason}", task_id))
+                    # 条件更新：判断与删除在同一条语句中完成，由行锁保证并发安全
+                    cur.execute(self._sql['soft_delete'], (f"已删除: {reason}", task_id))
                     success = cur.rowcount == 1
+                    
+                    if not success:
+                        # 仅在失败时查询状态，用于区分失败原因
+                        self._execute_prepared(cur, 'get_status', (task_id,))
+                        result = cur.fetchone()
                     conn.commit()
                     
                     if success:
                         logger.info(f"任务软删除成功 - ID: {task_id}, 原因: {reason}")
+                    elif not result:
+                        logger.warning(f"删除失败，任务不存在 - ID: {task_id}")
                     else:
-                        logger.warning(f"任务软删除失败 - ID: {task_id}")
+                        logger.warning(f"删除失败，任务已被删除 - ID: {task_id}")
                     return success
         except Exception as e:
             logger.error(f"删除任务异常: {e}")
             return False
     
     def batch_delete_tasks(self, task_ids: List[int], reason: str = "批量删除") -> Dict[str, int]:
-        """批量软删除任务"""
+        """批量软删除任务（单条语句完成删除并返回每个ID删除前的状态）"""
         result = {"success": 0, "failed": 0, "already_deleted": 0, "not_found": 0}
+        if not task_ids:
+            return result
         
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    for task_id in task_ids:
-                        try:
-                            # 检查任务状态
-                            cur.execute(f"SELECT status FROM {self.table_name} WHERE id = %s", (task_id,))
-                            task_result = cur.fetchone()
-                            
-                            if not task_result:
-                                result["not_found"] += 1
-                                continue
-                            
-                            if task_result[0] == -99:
-                                result["already_deleted"] += 1
-                                continue
-                            
-                            # 执行软删除
-                            cur.execute(f"""
-                                UPDATE {self.table_name} 
-                                SET status = -99, 
-                                    log = %s,
-                                    modified_at = CURRENT_TIMESTAMP
-                                WHERE id = %s
-                            """, (f"已删除: {reason}", task_id))
-                            
-                            if cur.rowcount == 1:
-                                result["success"] += 1
-                            else:
-                                result["failed"] += 1
-                                
-                        except Exception as e:
-                            logger.error(f"批量删除单个任务失败 - ID: {task_id}, 错误: {e}")
+                    # CTE 中的 SELECT 看到的是更新前的快照，可据此区分不存在/已删除
+                    rows = execute_values(
+                        cur, self._sql['batch_delete'],
+                        [(task_id, f"已删除: {reason}") for task_id in dict.fromkeys(task_ids)],
+                        page_size=1000, fetch=True)
+                    
+                    for _, old_status, deleted in rows:
+                        if deleted:
+                            result["success"] += 1
+                        elif old_status is None:
+                            result["not_found"] += 1
+                        elif old_status == -99:
+                            result["already_deleted"] += 1
+                        else:
                             result["failed"] += 1
-                            continue
                     
                     conn.commit()
                     logger.info(f"批量删除任务完成 - 成功: {result['success']}, 失败: {result['failed']}, "
@@ -398,32 +784,22 @@ class TaskHub:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    # 检查任务是否存在且已被删除
-                    cur.execute(f"SELECT status FROM {self.table_name} WHERE id = %s", (task_id,))
-                    result = cur.fetchone()
-                    if not result:
-                        logger.warning(f"恢复失败，任务不存在 - ID: {task_id}")
-                        return False
-                    
-                    if result[0] != -99:
-                        logger.warning(f"恢复失败，任务未被删除 - ID: {task_id}, 当前状态: {result[0]}")
-                        return False
-                    
-                    # 恢复任务
-                    cur.execute(f"""
-                        UPDATE {self.table_name} 
-                        SET status = %s, 
-                            log = %s,
-                            modified_at = CURRENT_TIMESTAMP
-                        WHERE id = %s
-                    """, (new_status, log, task_id))
+                    # 条件更新：只恢复处于已删除状态的任务
+                    cur.execute(self._sql['restore'], (new_status, log, task_id))
                     success = cur.rowcount == 1
+                    
+                    if not success:
+                        # 仅在失败时查询状态，用于区分失败原因
+                        self._execute_prepared(cur, 'get_status', (task_id,))
+                        result = cur.fetchone()
                     conn.commit()
                     
                     if success:
                         logger.info(f"任务恢复成功 - ID: {task_id}, 新状态: {new_status}")
+                    elif not result:
+                        logger.warning(f"恢复失败，任务不存在 - ID: {task_id}")
                     else:
-                        logger.warning(f"任务恢复失败 - ID: {task_id}")
+                        logger.warning(f"恢复失败，任务未被删除 - ID: {task_id}, 当前状态: {result[0]}")
                     return success
         except Exception as e:
             logger.error(f"恢复任务异常: {e}")
@@ -432,16 +808,10 @@ class TaskHub:
     def get_deleted_tasks(self, limit: int = 100) -> List[Dict[str, Any]]:
         """获取已删除的任务列表"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                    cur.execute(f"""
-                        SELECT id, url, title, duration, status, download_type, log, created_at, modified_at
-                        FROM {self.table_name} 
-                        WHERE status = -99 
-                        ORDER BY modified_at DESC 
-                        LIMIT %s
-                    """, (limit,))
-                    tasks = [dict(row) for row in cur.fetchall()]
+                    cur.execute(self._sql['get_deleted'], (limit,))
+                    tasks = cur.fetchall()
                     logger.debug(f"获取已删除任务: {len(tasks)}个")
                     return tasks
         except Exception as e:
@@ -454,19 +824,9 @@ class TaskHub:
     def get_task_statistics(self) -> Dict[str, int]:
         """获取任务统计信息"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(readonly=True) as conn:
                 with conn.cursor() as cur:
-                    cur.execute(f"""
-                        SELECT 
-                            COUNT(*) as total,
-                            COUNT(CASE WHEN status = 0 THEN 1 END) as pending,
-                            COUNT(CASE WHEN status = 1 THEN 1 END) as success,
-                            COUNT(CASE WHEN status = -1 THEN 1 END) as failed,
-                            COUNT(CASE WHEN status = 2 THEN 1 END) as processing,
-                            COUNT(CASE WHEN status = -99 THEN 1 END) as deleted,
-                            COUNT(CASE WHEN status NOT IN (0, 1, -1, 2, -99) THEN 1 END) as other
-                        FROM {self.table_name}
-                    """)
+                    cur.execute(self._sql['statistics'])
                     row = cur.fetchone()
                     stats = {
                         'total': row[0],
@@ -484,22 +844,38 @@ class TaskHub:
             logger.error(f"获取任务统计失败: {e}")
             return {'total': 0, 'pending': 0, 'success': 0, 'failed': 0, 'processing': 0, 'deleted': 0, 'other': 0, 'active': 0}
     
+    def get_task_statistics_fast(self) -> Dict[str, int]:
+        """获取近似任务统计信息（适用于仪表盘等不要求精确值的场景）
+        
+        total 取自 pg_class.reltuples 的估算值，不扫描全表；pending 和 processing
+        数量较少，可通过部分索引/复合索引精确计数。
+        """
+        try:
+            with self.get_connection(readonly=True) as conn:
+                with conn.cursor() as cur:
+                    # 按 search_path 解析出与 {t} 相同的表，避免其他 schema 中的同名表干扰
+                    regclass = sql.Identifier(self.table_name).as_string(conn)
+                    cur.execute(self._sql['statistics_fast'], (regclass,))
+                    row = cur.fetchone()
+                    stats = {
+                        'total': row[0] or 0,
+                        'pending': row[1],
+                        'processing': row[2]
+                    }
+                    logger.debug(f"近似任务统计: {stats}")
+                    return stats
+        except Exception as e:
+            logger.error(f"获取近似任务统计失败: {e}")
+            return {'total': 0, 'pending': 0, 'processing': 0}
+    
 
     def get_recent_tasks(self, hours: int = 24, limit: int = 100) -> List[Dict[str, Any]]:
         """获取最近指定小时内的任务"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                    cur.execute(f"""
-                        SELECT id, url, title, duration, status, download_type, log, created_at, modified_at
-                        FROM {self.table_name} 
-                        WHERE created_at >= NOW() - INTERVAL '%s hours'
-                        ORDER BY created_at DESC 
-                        LIMIT %s
-                    """, (hours, limit))
-                    tasks = [dict(row) for row in cur.fetchall()]
-                    logger.debug(f"获取最近{hours}小时任务: {len(tasks)}个")
-                    return tasks
+            with self.get_connection(readonly=True) as conn:
+                tasks = self._fetch_tasks(conn, self._sql['get_recent'], (hours, limit), limit)
+                logger.debug(f"获取最近{hours}小时任务: {len(tasks)}个")
+                return tasks
         except Exception as e:
             logger.error(f"获取最近任务失败: {e}")
             return []
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+配置文件加载工具
+
+按 (路径, 修改时间) 缓存 YAML 解析结果，文件未变化时直接复用，文件被修改后自动重新解析。
+"""
+
+import functools
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import yaml
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(path: str, mtime: float) -> Dict[str, Any]:
+    """解析YAML文件，mtime 仅作为缓存键的一部分"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def load_yaml(path: Union[str, Path]) -> Dict[str, Any]:
+    """加载YAML配置文件（带缓存）
+
+    返回的字典为缓存共享对象，调用方不应修改。
+
+    Args:
+        path: 配置文件路径
+
+    Returns:
+        解析后的配置字典
+
+    Raises:
+        FileNotFoundError: 配置文件不存在
+        yaml.YAMLError: 配置文件格式错误
+    """
+    path = Path(path)
+    return _load_yaml_cached(str(path), path.stat().st_mtime)
@@ -0,0 +1,53 @@
+"""
+JSON 序列化工具
+
+优先使用 orjson（原生支持 datetime，速度更快）；orjson 为可选依赖，缺失时退回标准库 json，
+两者输出格式保持一致（UTF-8、datetime 为 ISO 格式、缩进为2空格）。
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时退回标准库 json
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    """标准库 json 的回退序列化，datetime 输出与 orjson 一致的 ISO 格式"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON字节串
+
+    Args:
+        obj: 待序列化对象（dict 子类如 RealDictRow 亦可）
+        indent: 是否以2空格缩进（orjson 只支持2空格缩进）
+
+    Returns:
+        JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, default=_json_default)
+    else:
+        # 紧凑输出时去掉分隔符后的空格，与 orjson 一致
+        text = json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_json_default)
+    return text.encode('utf-8')
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """解析JSON字符串或UTF-8字节串
+
+    Raises:
+        json.JSONDecodeError: JSON格式错误（orjson.JSONDecodeError 为其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,42 +1,66 @@
-import yaml
+import functools
+import threading
 from pathlib import Path
 from langchain_openai import ChatOpenAI
 
+from modules.config_loader import load_yaml
 from configs.configs import DEFAULT_VENDOR, LLM_DEFAULT_MODEL_NAME, VLM_DEFAULT_MODEL_NAME
+
+CONFIG_PATH = Path(__file__).parent.parent / 'configs' / 'configs.yaml'
+
+
+@functools.lru_cache(maxsize=32)
+def _create_chat_client(model_name, temperature, api_key, endpoint):
+    # 凭证与地址也作为缓存键，配置文件修改后会创建新的客户端
+    return ChatOpenAI(
+        temperature=temperature,
+        model=model_name,
+        openai_api_key=api_key,
+        openai_api_base=endpoint
+    )
+
+
+def _temperature_key(temperature):
+    # 四舍五入后作为缓存键，避免浮点误差产生重复客户端；None 表示使用模型默认值，原样保留
+    return None if temperature is None else round(temperature, 4)
+
+
 class LLMFactory:
     _instance = None
+    _lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super(LLMFactory, cls).__new__(cls)
-            cls._instance.expense = {}
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(LLMFactory, cls).__new__(cls)
+                    instance.expense = {}
+                    cls._instance = instance
         return cls._instance
 
     @staticmethod
     def create_llm_instance(vendor=DEFAULT_VENDOR, model_name=LLM_DEFAULT_MODEL_NAME, temperature=0.95):
-        with open(Path(__file__).parent.parent / 'configs' / 'configs.yaml', 'r') as f:
-            config = yaml.safe_load(f)
-
-        return ChatOpenAI(
-            temperature=temperature,
-            model=model_name,
-            openai_api_key=config['LLM'][vendor]['api_key'],
-            openai_api_base=config['LLM'][vendor]['endpoint']
+        config = load_yaml(CONFIG_PATH)
+
+        return _create_chat_client(
+            model_name,
+            _temperature_key(temperature),
+            config['LLM'][vendor]['api_key'],
+            config['LLM'][vendor]['endpoint']
         )
 
     @staticmethod
     def create_vllm_instance(vendor=DEFAULT_VENDOR, model_name=VLM_DEFAULT_MODEL_NAME, temperature=0.95):
-        with open(Path(__file__).parent.parent / 'configs' / 'configs.yaml', 'r') as f:
-            config = yaml.safe_load(f)
-
-        return ChatOpenAI(
-            model=model_name,
-            openai_api_key=config['VLM'][vendor]['api_key'],
-            openai_api_base=config['VLM'][vendor]['endpoint'],
-            temperature=temperature
+        config = load_yaml(CONFIG_PATH)
+
+        return _create_chat_client(
+            model_name,
+            _temperature_key(temperature),
+            config['VLM'][vendor]['api_key'],
+            config['VLM'][vendor]['endpoint']
         )
 
 if __name__ == "__main__":
     ins = LLMFactory()
     a = ins.create_llm_instance()
-    print(a.predict("HI"))
\ No newline at end of file
+    print(a.predict("HI"))
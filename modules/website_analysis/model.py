@@ -1,13 +1,19 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple, Union
 import hashlib
 import uuid
-import json
 from datetime import datetime
 
+from modules import json_utils
 
-@dataclass
+
+# 已确认存在的截图子目录，避免重复调用 mkdir 产生多余的 stat 系统调用
+# 注意：进程运行期间若目录被外部删除，需自行重建
+_MKDIR_CACHE: Set[Path] = set()
+
+
+@dataclass(slots=True)
 class Page:
     id: str
     url: str
@@ -15,12 +21,29 @@ class Page:
     is_main_page: bool = False
     screenshot: Optional[Path] = None
     if_lazy_load: bool = False
+    # (hash输入, hash值) 缓存，url/id 变化时自动失效；不参与序列化与比较
+    _hash_cache: Optional[Tuple[str, str]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """初始化后自动生成ID（如果未提供）"""
         if not self.id:
             self.id = str(uuid.uuid4())
     
+    def _screenshot_hash(self) -> str:
+        """计算（或从缓存读取）基于URL和ID的hash值"""
+        hash_input = f"{self.url}_{self.id}"
+        if self._hash_cache is not None and self._hash_cache[0] == hash_input:
+            return self._hash_cache[1]
+        # 仅用作文件名/分桶键，不需要密码学强度；blake2b-128 比 md5 更快且长度相同
+        hash_value = hashlib.blake2b(hash_input.encode(), digest_size=16).hexdigest()
+        self._hash_cache = (hash_input, hash_value)
+        return hash_value
+    
+    @staticmethod
+    def _screenshot_path_for(hash_value: str, base_dir: Path) -> Path:
+        """由hash值拼出截图路径：使用hash的前两位作为子目录，避免单个目录文件过多"""
+        return base_dir / "screenshots" / hash_value[:2] / f"{hash_value}.png"
+    
     def generate_screenshot_path(self, base_dir: Path) -> Path:
         """
         基于website.url和website.id生成hash关系的截图存储路径
@@ -31,20 +54,38 @@ class Page:
         Returns:
             Path: 截图文件的完整路径
         """
-        # 创建基于URL和ID的hash
-        hash_input = f"{self.url}_{self.id}"
-        hash_value = hashlib.md5(hash_input.encode()).hexdigest()
+        screenshot_path = self._screenshot_path_for(self._screenshot_hash(), base_dir)
         
-        # 使用hash的前两位作为子目录，避免单个目录文件过多
-        sub_dir = hash_value[:2]
-        filename = f"{hash_value}.png"
+        # 确保目录存在（同一子目录只创建一次）
+        parent = screenshot_path.parent
+        if parent not in _MKDIR_CACHE:
+            parent.mkdir(parents=True, exist_ok=True)
+            _MKDIR_CACHE.add(parent)
         
-        screenshot_path = base_dir / "screenshots" / sub_dir / filename
+        return screenshot_path
+    
+    @classmethod
+    def batch_generate_screenshot_paths(cls, pages: Iterable['Page'], base_dir: Path) -> List[Path]:
+        """
+        批量生成截图存储路径，结果与逐个调用 generate_screenshot_path 相同
         
-        # 确保目录存在
-        screenshot_path.parent.mkdir(parents=True, exist_ok=True)
+        先统一计算所有hash，再对去重后的子目录一次性创建，
+        避免大批量Page时逐个检查/创建目录。
         
-        return screenshot_path
+        Args:
+            pages: Page实例列表
+            base_dir: 基础存储目录
+            
+        Returns:
+            List[Path]: 与pages顺序一致的截图路径列表
+        """
+        paths = [cls._screenshot_path_for(page._screenshot_hash(), base_dir) for page in pages]
+        
+        for parent in {path.parent for path in paths} - _MKDIR_CACHE:
+            parent.mkdir(parents=True, exist_ok=True)
+            _MKDIR_CACHE.add(parent)
+        
+        return paths
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -53,16 +94,29 @@ class Page:
         Returns:
             Dict[str, Any]: 包含所有字段的字典
         """
-        data = asdict(self)
-        
-        # 处理Path类型的字段
-        if self.screenshot:
-            data['screenshot'] = str(self.screenshot)
-        
-        # 添加时间戳
-        data['created_at'] = datetime.now().isoformat()
+        # 手工构造字典，避免 asdict 的字段反射与逐值深拷贝（所有字段均为不可变的扁平值）
+        return {
+            'id': self.id,
+            'url': self.url,
+            'need_login': self.need_login,
+            'is_main_page': self.is_main_page,
+            'screenshot': str(self.screenshot) if self.screenshot else None,
+            'if_lazy_load': self.if_lazy_load,
+            # 添加时间戳（保留datetime对象，由序列化阶段统一格式化）
+            'created_at': datetime.now(),
+        }
+    
+    def to_bytes(self, indent: int = 2) -> bytes:
+        """
+        将Page实例序列化为UTF-8编码的JSON字节串，写文件/网络传输时可省去一次编解码
         
-        return data
+        Args:
+            indent: JSON缩进级别（orjson 只支持2空格缩进，非0即按2处理）
+            
+        Returns:
+            bytes: JSON字节串
+        """
+        return json_utils.dumps(self.to_dict(), indent=bool(indent))
     
     def to_json(self, indent: int = 2) -> str:
         """
@@ -74,7 +128,7 @@ class Page:
         Returns:
             str: JSON字符串
         """
-        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+        return self.to_bytes(indent).decode('utf-8')
     
     def save_to_file(self, file_path: Path) -> None:
         """
@@ -85,9 +139,7 @@ class Page:
         """
         # 确保目录存在
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(self.to_json())
+        file_path.write_bytes(self.to_bytes())
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Page':
@@ -100,30 +152,29 @@ class Page:
         Returns:
             Page: Page实例
         """
-        # 创建数据副本，避免修改原始数据
-        page_data = data.copy()
-        
-        # 移除非Page字段的数据
-        page_data.pop('created_at', None)
-        
-        # 处理Path类型的字段
-        if 'screenshot' in page_data and page_data['screenshot']:
-            page_data['screenshot'] = Path(page_data['screenshot'])
-        
-        return cls(**page_data)
+        # 按字段逐个取值：不复制、不修改原始数据，并自然忽略 created_at 等非Page字段
+        screenshot = data.get('screenshot')
+        return cls(
+            id=data['id'],
+            url=data['url'],
+            need_login=data.get('need_login', False),
+            is_main_page=data.get('is_main_page', False),
+            screenshot=Path(screenshot) if screenshot else None,
+            if_lazy_load=data.get('if_lazy_load', False),
+        )
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'Page':
+    def from_json(cls, json_str: Union[str, bytes]) -> 'Page':
         """
         从JSON字符串创建Page实例
         
         Args:
-            json_str: JSON字符串
+            json_str: JSON字符串（也接受UTF-8字节串）
             
         Returns:
             Page: Page实例
         """
-        data = json.loads(json_str)
+        data = json_utils.loads(json_str)
         return cls.from_dict(data)
     
     @classmethod
@@ -139,15 +190,10 @@ class Page:
             
         Raises:
             FileNotFoundError: 文件不存在
-            json.JSONDecodeError: JSON格式错误
+            json.JSONDecodeError: JSON格式错误（orjson.JSONDecodeError 为其子类）
         """
-        if not file_path.exists():
-            raise FileNotFoundError(f"文件不存在: {file_path}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            json_str = f.read()
-        
-        return cls.from_json(json_str)
+        # 直接读取字节交给JSON解析，文件不存在时由 read_bytes 抛出 FileNotFoundError
+        return cls.from_json(file_path.read_bytes())
 
 
 # 使用示例和测试
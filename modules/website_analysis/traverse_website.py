@@ -1,27 +1,140 @@
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import List
 
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from modules.website_analysis.model import Page
 from loguru import logger
 
 USER_DATA_DIR = "/tmp/uc-profile"  # 可换成任意路径
+PAGE_LOAD_TIMEOUT = 10  # 等待页面加载/空闲的最长秒数（同时作为异步脚本超时）
+SCROLL_POLL_INTERVAL = 0.2  # 懒加载时轮询 scrollHeight 的间隔（秒）
+
+# 页面 load 事件触发后，再等浏览器进入空闲（requestIdleCallback）才回调；
+# 不支持 requestIdleCallback 的浏览器退化为 setTimeout
+WAIT_FOR_IDLE_JS = """
+var callback = arguments[arguments.length - 1];
+var idle = window.requestIdleCallback || function (cb) { return setTimeout(cb, 50); };
+function onIdle() { idle(function () { callback(true); }, {timeout: 3000}); }
+if (document.readyState === 'complete') {
+    onIdle();
+} else {
+    window.addEventListener('load', onIdle, {once: true});
+}
+"""
+
+def _build_base_options(headless: bool, load_images: bool) -> uc.ChromeOptions:
+    """构建不含用户数据目录的基础 ChromeOptions"""
+    options = uc.ChromeOptions()
+    options.add_argument("--disable-popup-blocking")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    if headless:
+        options.add_argument("--headless=new")
+        # 无头模式下没有窗口可最大化，显式指定截图尺寸
+        options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("--start-maximized")
+    if not load_images:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
 
 class TraverseWebsite:
-    def __init__(self):
+    # uc.Chrome 启动时会修补 chromedriver 可执行文件，并发创建会互相干扰，统一串行化
+    _driver_create_lock = threading.Lock()
+
+    def __init__(self, headless: bool = True, load_images: bool = True):
+        """
+        Args:
+            headless: 是否以无头模式运行Chrome（省去窗口合成/渲染开销）
+            load_images: 是否加载图片；仅需页面结构/文字时可关闭以减少下载和解码
+        """
         self.storage = Path('storage')/str(int(time.time()*1000))
         self.analysis_tree = {}
+        self.headless = headless
+        self.load_images = load_images
+        self._driver = None
+        # analyze_pages 使用的浏览器池：空闲驱动放在队列中，全部驱动及其用户数据目录编号记录在字典中以便关闭
+        self._driver_pool = queue.Queue()
+        self._pool_drivers = {}
+        # 已丢弃驱动释放出的用户数据目录编号，新建驱动时优先复用
+        self._free_profile_indexes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def driver(self):
+        """懒加载的ChromeDriver，多次分析复用同一个浏览器实例"""
+        if self._driver is None:
+            logger.info("🔧 正在创建ChromeDriver...")
+            with self._driver_create_lock:
+                self._driver = self.create_uc_driver(headless=self.headless, load_images=self.load_images)
+            logger.success("✅ ChromeDriver创建成功")
+        return self._driver
+
+    def _acquire_pool_driver(self):
+        """从浏览器池取出一个空闲驱动，池中没有时新建（每个驱动使用独立的用户数据目录）"""
+        try:
+            return self._driver_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._driver_create_lock:
+            if self._free_profile_indexes:
+                index = self._free_profile_indexes.pop()
+            else:
+                index = len(self._pool_drivers)
+            logger.info(f"🔧 正在创建池化ChromeDriver #{index}...")
+            try:
+                driver = self.create_uc_driver(
+                    headless=self.headless,
+                    load_images=self.load_images,
+                    user_data_dir=f"{USER_DATA_DIR}-{index}"
+                )
+            except Exception:
+                self._free_profile_indexes.append(index)
+                raise
+            self._pool_drivers[driver] = index
+        return driver
+
+    def _discard_pool_driver(self, driver):
+        """关闭已失效的池化驱动，不再放回浏览器池，下次取用时会新建"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭失效的ChromeDriver时出错: {e}")
+        with self._driver_create_lock:
+            index = self._pool_drivers.pop(driver, None)
+            if index is not None:
+                self._free_profile_indexes.append(index)
+
+    def close(self):
+        """关闭所有浏览器并释放资源"""
+        drivers = list(self._pool_drivers) + ([self._driver] if self._driver is not None else [])
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.warning(f"关闭ChromeDriver时出错: {e}")
+        self._driver = None
+        self._pool_drivers = {}
+        self._free_profile_indexes = []
+        self._driver_pool = queue.Queue()
 
     @staticmethod
-    def create_uc_driver():
-        options = uc.ChromeOptions()
-        options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        # options.add_argument("--headless")  # 如需无头模式
-        options.add_argument("--start-maximized")
+    def create_uc_driver(headless: bool = False, load_images: bool = True, user_data_dir: str = USER_DATA_DIR):
+        # 每个驱动使用全新的 options：uc.Chrome 会修改传入的对象并拒绝复用
+        options = _build_base_options(headless, load_images)
+        options.add_argument(f"--user-data-dir={user_data_dir}")
 
         try:
             driver = uc.Chrome(
@@ -29,6 +142,7 @@ class TraverseWebsite:
                 version_main=137,  # 改成你的 Chrome 主版本
                 driver_executable_path='/Users/anthonyf/Desktop/Tools/chromedriver/chromedriver'
             )
+            driver.set_script_timeout(PAGE_LOAD_TIMEOUT)
             return driver
         except Exception as e:
             logger.error(f"创建ChromeDriver失败: {e}")
@@ -38,68 +152,130 @@ class TraverseWebsite:
             logger.info("3. 或者更新ChromeDriver路径")
             raise
 
+    @staticmethod
+    def wait_for_idle(driver):
+        """等待页面加载完成且浏览器空闲，超时仅告警不中断"""
+        try:
+            driver.execute_async_script(WAIT_FOR_IDLE_JS)
+        except TimeoutException:
+            logger.warning(f"等待页面空闲超时 ({PAGE_LOAD_TIMEOUT}秒)，继续执行")
+
+    @staticmethod
+    def wait_for_stable_height(driver):
+        """轮询 document.body.scrollHeight，连续两次采样不变即认为懒加载内容已加载完成"""
+        deadline = time.monotonic() + PAGE_LOAD_TIMEOUT
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        stable_count = 0
+        while stable_count < 2:
+            if time.monotonic() >= deadline:
+                logger.warning(f"等待懒加载内容超时 ({PAGE_LOAD_TIMEOUT}秒)，继续执行")
+                return
+            time.sleep(SCROLL_POLL_INTERVAL)
+            height = driver.execute_script("return document.body.scrollHeight")
+            stable_count = stable_count + 1 if height == last_height else 0
+            last_height = height
+
     def analyze_page(self, page_ins: Page):
-        logger.info(f"🚀 开始分析页面: {page_ins.url}")
-        logger.info(f"📋 页面配置 - ID: {page_ins.id}, 需要登录: {page_ins.need_login}, 懒加载: {page_ins.if_lazy_load}")
+        # 使用实例级浏览器驱动（首次调用时创建）
+        return self._analyze_with_driver(self.driver, page_ins)
+
+    def analyze_pages(self, pages: List[Page], workers: int = 4) -> List[Page]:
+        """
+        使用多个浏览器并行分析页面（页面加载以网络等待为主，适合多线程并发）
         
-        # 创建浏览器驱动
-        logger.info("🔧 正在创建ChromeDriver...")
-        driver = self.create_uc_driver()
-        logger.success("✅ ChromeDriver创建成功")
+        Args:
+            pages: 待分析的Page列表
+            workers: 并行浏览器数量
+            
+        Returns:
+            List[Page]: 与输入顺序一致的Page列表；分析失败的页面不会生成截图
+        """
+        def analyze(page_ins: Page) -> Page:
+            driver = self._acquire_pool_driver()
+            try:
+                result = self._analyze_with_driver(driver, page_ins)
+            except TimeoutException:
+                # 页面级超时，浏览器本身仍可用
+                self._driver_pool.put(driver)
+                raise
+            except WebDriverException:
+                # 浏览器崩溃或失联（如 chrome not reachable），放回池中只会让后续页面继续失败
+                self._discard_pool_driver(driver)
+                raise
+            except Exception:
+                self._driver_pool.put(driver)
+                raise
+            self._driver_pool.put(driver)
+            return result
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(analyze, page_ins): page_ins for page_ins in pages}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"页面分析失败: {futures[future].url}, 错误: {e}")
+
+        return pages
+
+    def _analyze_with_driver(self, driver, page_ins: Page):
+        start_time = time.perf_counter()
+        logger.debug(f"🚀 开始分析页面: {page_ins.url}")
+        logger.debug(f"📋 页面配置 - ID: {page_ins.id}, 需要登录: {page_ins.need_login}, 懒加载: {page_ins.if_lazy_load}")
         
         # 访问页面
-        logger.info(f"🌐 正在访问页面: {page_ins.url}")
+        logger.debug(f"🌐 正在访问页面: {page_ins.url}")
         driver.get(page_ins.url)
-        logger.success("✅ 页面访问成功")
+        logger.debug("✅ 页面访问成功")
 
         # 等待页面加载
-        logger.info("⏳ 等待页面初始加载完成 (2秒)...")
-        time.sleep(2)
-        logger.success("✅ 页面初始加载完成")
+        logger.debug("⏳ 等待页面初始加载完成...")
+        self.wait_for_idle(driver)
+        logger.debug("✅ 页面初始加载完成")
 
         # 如果需要处理懒加载
         if page_ins.if_lazy_load:
-            logger.info("📜 检测到懒加载配置，开始处理懒加载内容...")
+            logger.debug("📜 检测到懒加载配置，开始处理懒加载内容...")
 
             # 滚动到页面底部触发懒加载
-            logger.info("⬇️ 滚动到页面底部触发懒加载...")
+            logger.debug("⬇️ 滚动到页面底部触发懒加载...")
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
 
-            logger.info("⏳ 等待懒加载内容加载 (2秒)...")
-            time.sleep(2)
-            logger.success("✅ 懒加载内容加载完成")
+            logger.debug("⏳ 等待懒加载内容加载...")
+            self.wait_for_stable_height(driver)
+            logger.debug("✅ 懒加载内容加载完成")
 
             # 滚动回顶部
-            logger.info("⬆️ 滚动回页面顶部...")
+            logger.debug("⬆️ 滚动回页面顶部...")
             driver.execute_script("window.scrollTo(0, 0);")
 
-            logger.info("⏳ 等待页面稳定 (1秒)...")
-            time.sleep(1)
-            logger.success("✅ 懒加载处理完成")
+            logger.debug("⏳ 等待页面稳定...")
+            self.wait_for_idle(driver)
+            logger.debug("✅ 懒加载处理完成")
 
         # 生成截图路径并保存
         if not page_ins.screenshot:
-            logger.info("📸 开始生成截图...")
+            logger.debug("📸 开始生成截图...")
             screenshot_path = page_ins.generate_screenshot_path(self.storage)
-            logger.info(f"📁 截图路径: {screenshot_path}")
+            logger.debug(f"📁 截图路径: {screenshot_path}")
 
             driver.save_screenshot(str(screenshot_path))
             page_ins.screenshot = screenshot_path
-            logger.success(f"✅ 截图已保存到: {screenshot_path}")
+            logger.debug(f"✅ 截图已保存到: {screenshot_path}")
         else:
-            logger.info("📸 页面已有截图，跳过截图生成")
-
+            logger.debug("📸 页面已有截图，跳过截图生成")
 
-
-        logger.success(f"🎉 页面分析完成: {page_ins.url}")
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(f"🎉 页面分析完成: {page_ins.url}, 耗时 {elapsed_ms:.0f}ms")
         return page_ins
 
 
 
 if __name__ == "__main__":
-    # 创建测试实例
-    ins = TraverseWebsite()
-    
+    # 日志格式化放到后台线程，避免阻塞页面分析
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True)
+
     # 创建测试网站实例
     test_website = Page(
         id="test_001",
@@ -112,8 +288,9 @@ if __name__ == "__main__":
     logger.info(f"开始分析网站: {test_website.url}")
     logger.info(f"网站ID: {test_website.id}")
     
-    # 分析页面并截图
-    result = ins.analyze_page(test_website)
+    # 分析页面并截图，退出时自动关闭浏览器
+    with TraverseWebsite() as ins:
+        result = ins.analyze_page(test_website)
     
     if result.screenshot:
         logger.success(f"分析完成，截图路径: {result.screenshot}")
@@ -3,6 +3,7 @@
 创建 bilibili_tasks_demo 表的脚本
 """
 
+import re
 import sys
 from pathlib import Path
 from loguru import logger
@@ -13,6 +14,9 @@ sys.path.insert(0, str(project_root))
 
 from modules.bilibili.task_hub import TaskHub
 
+# 匹配以 SELECT 开头的语句，允许前面有空白和 -- 注释行
+_SELECT_RE = re.compile(r'\s*(?:--[^\n]*\n\s*)*SELECT\b', re.IGNORECASE)
+
 
 def create_demo_table():
     """创建演示表"""
@@ -45,28 +49,29 @@ def create_demo_table():
         return False
     
     try:
-        with open(sql_file, 'r', encoding='utf-8') as f:
-            sql_script = f.read()
+        sql_script = sql_file.read_text(encoding='utf-8')
         
         print("\n🚀 执行建表脚本...")
         
         # 执行 SQL 脚本
         with task_hub.get_connection() as conn:
             with conn.cursor() as cur:
-                # 分割并执行每个 SQL 语句
+                # 分割 SQL 语句：非查询语句合并为一次执行，SELECT 语句单独执行以获取结果
                 statements = [stmt.strip() for stmt in sql_script.split(';') if stmt.strip()]
+                select_statements = []
+                other_statements = []
+                for stmt in statements:
+                    (select_statements if _SELECT_RE.match(stmt) else other_statements).append(stmt)
+                
+                if other_statements:
+                    cur.execute(';\n'.join(other_statements))
+                    print(f"   ✅ 已执行 {len(other_statements)} 条语句")
                 
-                for i, statement in enumerate(statements, 1):
-                    if statement.upper().startswith('SELECT'):
-                        # 对于 SELECT 语句，获取结果
-                        cur.execute(statement)
-                        results = cur.fetchall()
-                        if results:
-                            print(f"   📊 查询结果: {results}")
-                    else:
-                        # 对于其他语句，直接执行
-                        cur.execute(statement)
-                        print(f"   ✅ 执行语句 {i}: {statement[:50]}...")
+                for statement in select_statements:
+                    cur.execute(statement)
+                    results = cur.fetchall()
+                    if results:
+                        print(f"   📊 查询结果: {results}")
                 
                 conn.commit()
         
@@ -76,7 +81,7 @@ def create_demo_table():
         print("   - 表名: bilibili_tasks_demo")
         print("   - 主键: id (SERIAL, 独立序列)")
         print("   - 字段: 与 bilibili_tasks 完全相同")
-        print("   - 索引: status, created_at, url")
+        print("   - 索引: created_at, url, 以及匹配 TaskHub 查询的部分/复合索引")
         print("   - 触发器: 自动更新 modified_at")
         print("   - 测试数据: 3 条示例记录")
         
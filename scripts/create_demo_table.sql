@@ -23,9 +23,12 @@ CREATE TABLE bilibili_tasks_demo (
 );
 
 -- 创建索引以提高查询性能
-CREATE INDEX idx_bilibili_tasks_demo_status ON bilibili_tasks_demo(status);
 CREATE INDEX idx_bilibili_tasks_demo_created_at ON bilibili_tasks_demo(created_at);
 CREATE INDEX idx_bilibili_tasks_demo_url ON bilibili_tasks_demo(url);
+-- 与 TaskHub 查询条件匹配的索引
+CREATE INDEX idx_bilibili_tasks_demo_pending_created_at ON bilibili_tasks_demo(created_at) WHERE status = 0;  -- 待处理任务（部分索引）
+CREATE INDEX idx_bilibili_tasks_demo_status_created_at ON bilibili_tasks_demo(status, created_at DESC);  -- 按状态查询（同时覆盖仅按 status 过滤的查询）
+CREATE INDEX idx_bilibili_tasks_demo_deleted_modified_at ON bilibili_tasks_demo(modified_at DESC) WHERE status = -99;  -- 已删除任务（部分索引）
 
 -- 创建触发器：在更新记录时自动更新 modified_at
 -- 复用现有的触发器函数 update_modified_at_column()
@@ -24,9 +24,12 @@ CREATE TABLE bilibili_tasks (
 );
 
 -- 创建索引以提高查询性能
-CREATE INDEX idx_bilibili_tasks_status ON bilibili_tasks(status);
 CREATE INDEX idx_bilibili_tasks_created_at ON bilibili_tasks(created_at);
 CREATE INDEX idx_bilibili_tasks_url ON bilibili_tasks(url);
+-- 与 TaskHub 查询条件匹配的索引
+CREATE INDEX idx_bilibili_tasks_pending_created_at ON bilibili_tasks(created_at) WHERE status = 0;  -- 待处理任务（部分索引）
+CREATE INDEX idx_bilibili_tasks_status_created_at ON bilibili_tasks(status, created_at DESC);  -- 按状态查询（同时覆盖仅按 status 过滤的查询）
+CREATE INDEX idx_bilibili_tasks_deleted_modified_at ON bilibili_tasks(modified_at DESC) WHERE status = -99;  -- 已删除任务（部分索引）
 
 -- 创建触发器函数：自动更新 modified_at 字段
 CREATE OR REPLACE FUNCTION update_modified_at_column() RETURNS TRIGGER AS $BODY$ BEGIN NEW.modified_at = CURRENT_TIMESTAMP; RETURN NEW; END; $BODY$ language 'plpgsql';
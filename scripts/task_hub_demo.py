@@ -18,6 +18,7 @@ from pathlib import Path
 from typing import List
 from datetime import datetime
 from loguru import logger
+from psycopg2 import sql
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent
@@ -94,13 +95,15 @@ def demo_task_retrieval(task_hub: TaskHub, demo_task_ids: List[int]):
     if demo_task_ids:
         task_detail = task_hub.get_task_by_id(demo_task_ids[0])
         if task_detail:
-            logger.success("   任务详情:")
-            logger.info(f"      ID: {task_detail['id']}")
-            logger.info(f"      URL: {task_detail['url']}")
-            logger.info(f"      标题: {task_detail['title']}")
-            logger.info(f"      时长: {task_detail['duration']}秒")
-            logger.info(f"      状态: {task_detail['status']}")
-            logger.info(f"      创建时间: {task_detail['created_at']}")
+            logger.success(
+                "   任务详情:\n"
+                f"      ID: {task_detail['id']}\n"
+                f"      URL: {task_detail['url']}\n"
+                f"      标题: {task_detail['title']}\n"
+                f"      时长: {task_detail['duration']}秒\n"
+                f"      状态: {task_detail['status']}\n"
+                f"      创建时间: {task_detail['created_at']}"
+            )
     
     # 3. 根据状态获取任务列表
     logger.info("3️⃣ 根据状态获取任务列表:")
@@ -184,10 +187,12 @@ def demo_soft_delete_features(task_hub: TaskHub) -> List[int]:
     # 2. 查看初始统计
     logger.info("📈 步骤2: 查看初始统计")
     stats = task_hub.get_task_statistics()
-    logger.info(f"   总任务数: {stats['total']}")
-    logger.info(f"   活跃任务数: {stats['active']}")
-    logger.info(f"   已删除任务数: {stats['deleted']}")
-    logger.info(f"   待处理: {stats['pending']}")
+    logger.info(
+        f"   总任务数: {stats['total']}\n"
+        f"   活跃任务数: {stats['active']}\n"
+        f"   已删除任务数: {stats['deleted']}\n"
+        f"   待处理: {stats['pending']}"
+    )
     
     # 3. 单个任务软删除
     logger.info("🗑️ 步骤3: 单个任务软删除")
@@ -221,10 +226,12 @@ def demo_soft_delete_features(task_hub: TaskHub) -> List[int]:
     # 6. 查看更新后的统计
     logger.info("📈 步骤6: 查看删除后统计")
     stats = task_hub.get_task_statistics()
-    logger.info(f"   总任务数: {stats['total']}")
-    logger.info(f"   活跃任务数: {stats['active']}")
-    logger.info(f"   已删除任务数: {stats['deleted']}")
-    logger.info(f"   待处理: {stats['pending']}")
+    logger.info(
+        f"   总任务数: {stats['total']}\n"
+        f"   活跃任务数: {stats['active']}\n"
+        f"   已删除任务数: {stats['deleted']}\n"
+        f"   待处理: {stats['pending']}"
+    )
     
     # 7. 恢复一个任务
     logger.info("♻️ 步骤7: 恢复任务")
@@ -239,10 +246,12 @@ def demo_soft_delete_features(task_hub: TaskHub) -> List[int]:
         # 查看恢复后的统计
         logger.info("📈 步骤8: 查看恢复后统计")
         stats = task_hub.get_task_statistics()
-        logger.info(f"   总任务数: {stats['total']}")
-        logger.info(f"   活跃任务数: {stats['active']}")
-        logger.info(f"   已删除任务数: {stats['deleted']}")
-        logger.info(f"   待处理: {stats['pending']}")
+        logger.info(
+            f"   总任务数: {stats['total']}\n"
+            f"   活跃任务数: {stats['active']}\n"
+            f"   已删除任务数: {stats['deleted']}\n"
+            f"   待处理: {stats['pending']}"
+        )
     
     return [delete_task_id] + batch_delete_ids
 
@@ -254,15 +263,17 @@ def demo_statistics_and_queries(task_hub: TaskHub):
     # 1. 获取任务统计信息
     logger.info("1️⃣ 任务统计信息:")
     stats = task_hub.get_task_statistics()
-    logger.success("   统计结果:")
-    logger.info(f"      总任务数: {stats['total']}")
-    logger.info(f"      活跃任务数: {stats['active']}")
-    logger.info(f"      待处理: {stats['pending']}")
-    logger.info(f"      成功: {stats['success']}")
-    logger.info(f"      失败: {stats['failed']}")
-    logger.info(f"      处理中: {stats['processing']}")
-    logger.info(f"      已删除: {stats['deleted']}")
-    logger.info(f"      其他状态: {stats['other']}")
+    logger.success(
+        "   统计结果:\n"
+        f"      总任务数: {stats['total']}\n"
+        f"      活跃任务数: {stats['active']}\n"
+        f"      待处理: {stats['pending']}\n"
+        f"      成功: {stats['success']}\n"
+        f"      失败: {stats['failed']}\n"
+        f"      处理中: {stats['processing']}\n"
+        f"      已删除: {stats['deleted']}\n"
+        f"      其他状态: {stats['other']}"
+    )
     
     # 2. 获取最近任务
     logger.info("2️⃣ 获取最近24小时内的任务:")
@@ -302,16 +313,13 @@ def demo_advanced_usage(task_hub: TaskHub):
     # 2. 批量处理演示
     logger.info("2️⃣ 批量处理演示:")
     
-    # 获取所有待处理任务
+    # 查看待处理任务（只读）
     pending_tasks = task_hub.get_pending_tasks(limit=10)
     logger.info(f"   📋 获取到 {len(pending_tasks)} 个待处理任务")
     
-    # 模拟批量处理
-    processed_count = 0
-    for task in pending_tasks[:2]:  # 只处理前2个作为演示
-        task_hub.mark_task_processing(task['id'], "批量处理中")
-        processed_count += 1
-    logger.info(f"   ⚡ 批量标记 {processed_count} 个任务为处理中")
+    # 原子领取任务：选取与标记处理中在一条语句内完成，并发工作进程不会重复领取
+    claimed_tasks = task_hub.claim_pending_tasks(limit=2, log="批量处理中")  # 只处理前2个作为演示
+    logger.info(f"   ⚡ 领取并标记 {len(claimed_tasks)} 个任务为处理中")
 
 
 def cleanup_demo_data(task_hub: TaskHub):
@@ -334,11 +342,12 @@ def cleanup_demo_data(task_hub: TaskHub):
                     "https://www.bilibili.com/video/BV_SOFT_DELETE_TEST_4"
                 ]
                 
-                deleted_count = 0
-                for url in demo_urls:
-                    cur.execute(f"DELETE FROM {task_hub.table_name} WHERE url = %s", (url,))
-                    if cur.rowcount > 0:
-                        deleted_count += cur.rowcount
+                # 一条语句删除全部演示URL，只需一次往返
+                cur.execute(
+                    sql.SQL("DELETE FROM {} WHERE url = ANY(%s)").format(sql.Identifier(task_hub.table_name)),
+                    (demo_urls,)
+                )
+                deleted_count = cur.rowcount
                 
                 conn.commit()
                 logger.success(f"   清理完成，删除了 {deleted_count} 个演示任务")